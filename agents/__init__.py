@@ -1,3 +1,4 @@
 from .agent_base import Agent
 from .expense_agents import ExpenseExtractorAgent
+from .income_agents import IncomeExtractorAgent
 from .coordinator_agents import TaskCoordinatorAgent
\ No newline at end of file
@@ -0,0 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+
+    # Decodificador em Rust; aceita str ou bytes e é várias vezes mais rápido
+    # que o json da biblioteca padrão nos argumentos de ferramenta.
+    loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    import json
+
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+# Abaixo deste tamanho decodificar é mais barato que trocar de thread.
+OFFLOAD_THRESHOLD = 8 * 1024
+
+_pool: ThreadPoolExecutor = None
+
+
+async def aloads(data):
+    """
+    Decodifica JSON sem bloquear o event loop.
+
+    Payloads grandes são decodificados em um pool de threads dedicado, para
+    que o loop continue atendendo os demais agentes; os pequenos são
+    decodificados diretamente.
+    """
+    if len(data) < OFFLOAD_THRESHOLD:
+        return loads(data)
+
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="json")
+    return await asyncio.get_running_loop().run_in_executor(_pool, loads, data)
@@ -0,0 +1,5 @@
+import logging
+
+# Logger compartilhado pelos agentes. A configuração (handlers, nível e formato)
+# fica a cargo do ponto de entrada da aplicação.
+logger = logging.getLogger("agents")
\ No newline at end of file
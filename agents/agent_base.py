@@ -1,78 +1,253 @@
+import hashlib
+import json
 import logging
+import re
+import time
 from abc import ABC, abstractmethod
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-logger = logging.getLogger(__name__)
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+from . import _json
+from ._logging import logger
+from .response_cache import ResponseCache
+
+# Sequências de espaços e tabulações dentro de uma linha.
+_INLINE_SPACES = re.compile(r"[ \t]+")
+
+
+def _freeze(value):
+    """Converte argumentos de construção em uma forma hashable para a chave do pool."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, deque)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 
 class Agent(ABC):
     """Classe base para agentes inteligentes."""
 
-    def __init__(self, client, prompt: str, tools: list, store_context: bool = False, initial_context: list = None):
+    # Cache compartilhado entre todos os agentes. A chave inclui o prompt, o
+    # contexto e as ferramentas, então agentes distintos não colidem.
+    # Atribua None para desativar.
+    response_cache: ResponseCache = ResponseCache(maxsize=10000, ttl=3600)
+
+    # Instâncias ociosas reaproveitadas por acquire/release, indexadas por
+    # (classe, cliente, usuário, store_context, argumentos de construção) e com
+    # o instante em que foram devolvidas.
+    _pool: Dict[tuple, List[Tuple["Agent", float]]] = {}
+    max_idle_seconds: float = 300
+
+    # Tabela de despacho das ferramentas, montada no corpo de cada subclasse:
+    # nome da função -> callable que recebe os argumentos decodificados e
+    # retorna a lista de itens extraídos.
+    _HANDLERS: Dict[str, Callable[[dict], list]] = {}
+
+    # Número padrão de turnos (usuário + assistente) mantidos no contexto.
+    MAX_TURNS = 20
+
+    def __init__(self, client, prompt: str, tools: list, store_context: bool = False, initial_context: list = None,
+                 max_turns: int = None):
         """
         Inicializa o agente com os parâmetros necessários.
 
         Args:
-            client: Instância do cliente OpenAI.
+            client: Instância do cliente assíncrono OpenAI.
             prompt: Prompt do agente.
             tools: Lista de ferramentas associadas ao agente.
             store_context: Define se o agente deve armazenar contexto.
             initial_context: Lista inicial de mensagens de contexto.
+            max_turns: Quantidade máxima de turnos mantidos no contexto; os mais
+                antigos são descartados. Padrão: MAX_TURNS.
         """
         self.client = client
         self.prompt = prompt
         self.tools = tools
         self.store_context = store_context
-        self.context = initial_context if initial_context is not None else []
+        self.max_turns = max_turns if max_turns is not None else self.MAX_TURNS
+        # Um item por turno: a mensagem do usuário e, se houver, a resposta em texto.
+        self.context = deque(self._group_turns(initial_context or ()), maxlen=self.max_turns)
+        self._last_input_hash = None
+        # Mensagem de sistema montada uma única vez e compartilhada entre as chamadas.
+        self._base_messages = ({"role": "system", "content": prompt},)
+        # O schema das ferramentas é fixo: serializado uma vez para a chave de cache.
+        self._tools_digest = hashlib.sha256(
+            json.dumps(tools, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    @classmethod
+    def acquire(cls, client, user, store_context: bool = False, **kwargs) -> "Agent":
+        """
+        Obtém uma instância ociosa do pool ou cria uma nova.
+
+        Evita reconstruir o agente a cada mensagem e mantém o contexto dos
+        agentes com store_context=True entre as requisições do mesmo usuário.
+        Instâncias só são reaproveitadas para o mesmo usuário (ou sessão) e os
+        mesmos argumentos de construção, para que o contexto de um usuário
+        nunca seja enviado em nome de outro.
+        """
+        cls.evict_idle()
+        key = (cls, client, user, store_context, _freeze(kwargs))
+        idle = Agent._pool.get(key)
+        if idle:
+            agent, _ = idle.pop()
+            return agent
+        agent = cls(client, store_context=store_context, **kwargs)
+        agent._pool_key = key
+        return agent
+
+    def release(self) -> None:
+        """Devolve ao pool um agente obtido por acquire."""
+        key = getattr(self, "_pool_key", None)
+        if key is None:
+            return
+        if not self.store_context:
+            self.clear_context()
+        Agent._pool.setdefault(key, []).append((self, time.monotonic()))
+
+    @classmethod
+    def evict_idle(cls) -> None:
+        """Remove do pool as instâncias ociosas há mais de max_idle_seconds."""
+        now = time.monotonic()
+        for key in list(Agent._pool):
+            alive = [(agent, released_at) for agent, released_at in Agent._pool[key]
+                     if now - released_at <= agent.max_idle_seconds]
+            if alive:
+                Agent._pool[key] = alive
+            else:
+                del Agent._pool[key]
 
     @abstractmethod
-    def process(self, user_input: str):
+    async def process(self, user_input: str):
         """Processa a entrada do usuário e retorna a resposta."""
         pass
 
-    @abstractmethod
-    def _process_tool_calls(self, response):
+    async def _process_tool_calls(self, response) -> list:
         """
         Processa as chamadas de ferramenta da resposta.
-        Deve ser implementado por subclasses para lidar com ferramentas específicas.
+        Cada chamada é despachada pela tabela _HANDLERS da subclasse;
+        ferramentas desconhecidas são ignoradas.
         """
-        pass
+        tool_calls = response.tool_calls
+        if not tool_calls:
+            return []
+
+        handlers = self._HANDLERS
+        aloads = _json.aloads
+        if len(tool_calls) == 1:
+            # Caso mais comum: uma única chamada, sem acumular resultados.
+            function = tool_calls[0].function
+            handler = handlers.get(function.name)
+            return handler(await aloads(function.arguments)) if handler else []
 
-    def _get_response(self, user_input: str):
+        items = []
+        for tool_call in tool_calls:
+            handler = handlers.get(tool_call.function.name)
+            if handler:
+                items.extend(handler(await aloads(tool_call.function.arguments)))
+        return items
+
+    async def _get_response(self, user_input: str):
         """Constrói a mensagem, envia ao modelo e atualiza o contexto."""
+        user_input = self._normalize_input(user_input)
         messages = self._build_messages(user_input)
-        response = self.client.send_messages(messages, self.tools)
+        if self.response_cache is None:
+            response = await self.client.send_messages(messages, self.tools)
+        else:
+            response = await self.response_cache.get_or_fetch(
+                self._cache_key(messages),
+                lambda: self.client.send_messages(messages, self.tools)
+            )
         self._log_response(user_input, response)
         self._update_context(user_input, response)
         return response
 
+    @staticmethod
+    def _normalize_input(user_input: str) -> str:
+        """
+        Remove espaços nas bordas de cada linha e colapsa espaços e tabulações
+        repetidos. Entradas que diferem apenas nos espaços passam a compartilhar
+        a mesma chave de cache. As quebras de linha são preservadas, pois
+        separam itens de listas e as entradas numeradas de process_batch;
+        maiúsculas também, pois fazem parte das descrições extraídas.
+        """
+        return "\n".join(
+            _INLINE_SPACES.sub(" ", line).strip() for line in user_input.strip().splitlines()
+        )
+
+    def _cache_key(self, messages: list) -> str:
+        """Gera a chave de cache a partir do modelo, das mensagens e das ferramentas."""
+        payload = json.dumps(
+            [getattr(self.client, "model", None), self._tools_digest, messages],
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
     def _log_response(self, user_input, response):
         """Registra as informações relevantes da resposta do agente."""
+        tool_calls = getattr(response, "tool_calls", None)
+        if not tool_calls:
+            logger.warning("Nenhuma chamada de ferramenta detectada.")
+
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         logger.info("Entrada do usuário: %s", user_input)
-        logger.info("Resposta recebida: %s", response)
 
-        if hasattr(response, 'tool_calls') and response.tool_calls:
+        # A resposta completa inclui os argumentos das ferramentas, que podem
+        # ter vários KB: ela e os argumentos só são registrados em DEBUG.
+        log_arguments = logger.isEnabledFor(logging.DEBUG)
+        if log_arguments:
+            logger.debug("Resposta recebida: %s", response)
+
+        if tool_calls:
             logger.info("Chamadas de ferramenta detectadas:")
-            for call in response.tool_calls:
-                logger.info("Função: %s, Argumentos: %s", call.function.name, call.function.arguments)
-        else:
-            logger.warning("Nenhuma chamada de ferramenta detectada.")
+            for call in tool_calls:
+                logger.info("Função: %s", call.function.name)
+                if log_arguments:
+                    logger.debug("Argumentos: %s", call.function.arguments)
 
     def _build_messages(self, user_input: str):
         """Monta a lista de mensagens a serem enviadas ao modelo."""
-        messages = [{"role": "system", "content": self.prompt}]
+        messages = list(self._base_messages)
 
         if self.store_context:
-            messages.extend(self.context)
+            for turn in self.context:
+                messages.extend(turn)
 
         messages.append({"role": "user", "content": user_input})
         return messages
 
     def _update_context(self, user_input: str, response):
-        """Atualiza o contexto armazenado, se ativado."""
+        """
+        Atualiza o contexto armazenado, se ativado.
+        Uma entrada idêntica à anterior não é armazenada de novo, evitando
+        reenviar turnos duplicados nas próximas chamadas.
+        """
         if self.store_context:
-            self.context.append({"role": "user", "content": user_input})
-            if hasattr(response, "content"):
-                self.context.append({"role": "assistant", "content": response.content})
+            input_hash = hash(user_input)
+            if input_hash == self._last_input_hash:
+                return
+            self._last_input_hash = input_hash
+
+            turn = [{"role": "user", "content": user_input}]
+            # Respostas só com chamadas de ferramenta não têm texto a guardar.
+            content = getattr(response, "content", None)
+            if content is not None:
+                turn.append({"role": "assistant", "content": content})
+            self.context.append(tuple(turn))
+
+    @staticmethod
+    def _group_turns(messages) -> List[tuple]:
+        """Agrupa uma lista de mensagens em turnos, cada um iniciado por uma mensagem do usuário."""
+        turns = []
+        for message in messages:
+            if not turns or message.get("role") == "user":
+                turns.append([])
+            turns[-1].append(message)
+        return [tuple(turn) for turn in turns]
 
     def clear_context(self):
         """Limpa o contexto armazenado."""
-        self.context = []
\ No newline at end of file
+        self.context.clear()
+        self._last_input_hash = None
\ No newline at end of file
@@ -1,5 +1,5 @@
-import json
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Tuple
 from agents import Agent
 
 class TaskCoordinatorAgent(Agent):
@@ -99,33 +99,76 @@ class TaskCoordinatorAgent(Agent):
         }
     ]
 
-    def __init__(self, client, store_context=False, initial_context=None):
-        """Inicializa o agente com um cliente"""
+    # Extrai o resultado de cada ferramenta a partir dos argumentos decodificados.
+    _HANDLERS = {
+        "identify_tasks": lambda arguments: arguments.get("tasks", []),
+    }
+
+    # Limite padrão de chamadas simultâneas aos agentes especializados.
+    MAX_CONCURRENT = 10
+
+    def __init__(self, client, store_context=False, initial_context=None, agents: Dict[str, Agent] = None,
+                 max_turns=None, max_concurrent: int = None):
+        """Inicializa o agente com um cliente e os agentes especializados indexados pelo nome"""
         super().__init__(
             client,
             self.SYSTEM_PROMPT,
             self.TOOLS,
             store_context,
-            initial_context
+            initial_context,
+            max_turns
         )
+        self.agents = agents if agents is not None else {}
+        self.max_concurrent = max_concurrent or self.MAX_CONCURRENT
 
-    def process(self, user_input: str):
+    async def process(self, user_input: str):
         """Extrai tarefas de uma entrada de usuário.
         Retorna uma lista de tarefas identificadas contendo
             - tasks: lista de tarefas
         """
 
-        response = self._get_response(user_input)
-        return self._process_tool_calls(response)
+        response = await self._get_response(user_input)
+        return await self._process_tool_calls(response)
+
+    async def delegate(self, tasks: List[Dict[str, Any]]) -> List[Any]:
+        """Despacha as tarefas identificadas aos agentes especializados.
 
-    def _process_tool_calls(self, response) -> List[Dict[str, Any]]:
+        As chamadas são independentes, então são executadas em paralelo, no
+        máximo max_concurrent por vez para não estourar o limite de
+        requisições da API. Retorna, na ordem das tarefas, o resultado de
+        cada agente ou a exceção lançada por ele.
         """
-        Processa as chamadas de ferramenta e
-        retorna a lista de tarefas identificadas.
+        run = self._task_runner(tasks)
+        return await asyncio.gather(*(run(task) for task in tasks), return_exceptions=True)
+
+    async def delegate_as_completed(self, tasks: List[Dict[str, Any]]) -> AsyncIterator[Tuple[Dict[str, Any], Any]]:
+        """Despacha as tarefas e devolve cada par (tarefa, resultado) assim que concluído.
+
+        Permite, por exemplo, salvar as despesas extraídas enquanto os
+        rendimentos ainda estão sendo processados. Assim como em delegate,
+        uma exceção lançada pelo agente é devolvida no lugar do resultado.
         """
-        tasks = []
-        for tool_call in response.tool_calls:
-            if tool_call.function.name == "identify_tasks":
-                arguments = json.loads(tool_call.function.arguments)
-                tasks.extend(arguments.get("expenses", []))
-        return tasks
\ No newline at end of file
+        run = self._task_runner(tasks)
+
+        async def run_with_task(task):
+            try:
+                return task, await run(task)
+            except Exception as e:
+                return task, e
+
+        for completed in asyncio.as_completed([run_with_task(task) for task in tasks]):
+            yield await completed
+
+    def _task_runner(self, tasks: List[Dict[str, Any]]):
+        """Valida os agentes das tarefas e retorna a corrotina que executa cada uma."""
+        unknown = {task["agent"] for task in tasks} - self.agents.keys()
+        if unknown:
+            raise ValueError(f"Agentes não registrados no coordenador: {', '.join(sorted(unknown))}")
+
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def run(task):
+            async with semaphore:
+                return await self.agents[task["agent"]].process(task["message_to_agent"])
+
+        return run
\ No newline at end of file
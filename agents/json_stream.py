@@ -0,0 +1,63 @@
+import json
+import re
+from typing import Any, List
+
+
+class JsonArrayStream:
+    """
+    Decodifica incrementalmente os itens de um array JSON à medida que o texto chega.
+
+    Pensado para argumentos de ferramenta recebidos em streaming, como
+    '{"expenses": [{...}, {...}]}': cada item é devolvido assim que o objeto
+    correspondente se fecha, sem esperar o restante da resposta.
+    Os itens devem ser objetos, arrays ou strings; números soltos poderiam
+    ser decodificados antes de chegarem por completo.
+    """
+
+    _decoder = json.JSONDecoder()
+    _SEPARATORS = " \t\n\r,"
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: Nome da chave cujo valor é o array a ser decodificado.
+        """
+        self._start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._started = False
+        self.done = False
+
+    def feed(self, fragment: str) -> List[Any]:
+        """Acrescenta um trecho do JSON e retorna os itens que foram concluídos."""
+        if self.done:
+            return []
+
+        self._buffer += fragment
+        if not self._started:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._started = True
+
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in self._SEPARATORS:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                break
+            try:
+                item, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Item ainda incompleto: aguarda o próximo trecho.
+                break
+            items.append(item)
+
+        # Descarta o que já foi consumido para não reprocessar o buffer inteiro.
+        self._buffer = buffer[pos:]
+        return items
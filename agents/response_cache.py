@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """
+    Cache LRU com expiração (TTL) para respostas do modelo.
+
+    Requisições concorrentes com a mesma chave são agrupadas: apenas a
+    primeira consulta o modelo e as demais aguardam o mesmo resultado.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600):
+        """
+        Args:
+            maxsize: Número máximo de respostas armazenadas.
+            ttl: Tempo de vida de cada resposta, em segundos.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retorna a resposta armazenada para a chave, se ainda for válida."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Armazena a resposta, descartando as menos usadas quando cheio."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Retorna a resposta em cache ou a obtém com `fetch`.
+
+        Se já houver uma busca em andamento para a mesma chave, aguarda o
+        resultado dela em vez de disparar uma nova chamada. Se quem iniciou a
+        busca for cancelado, os demais não herdam o cancelamento: um deles
+        assume a busca e os outros passam a aguardá-lo.
+        """
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # A busca foi cancelada junto com quem a iniciou, não este chamador.
+                if inflight.cancelled():
+                    continue
+                raise
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Marca a exceção como consumida caso não haja outros aguardando.
+            future.exception()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, float]:
+        """Retorna acertos, falhas e a taxa de acerto de get_or_fetch."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries)
+        }
+
+    def clear(self) -> None:
+        """Remove todas as respostas armazenadas e zera as estatísticas."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,33 +1,60 @@
 import os
-from openai import OpenAI
+import asyncio
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
-from agents import TaskCoordinatorAgent
+from db import init_db
+from agents import TaskCoordinatorAgent, ExpenseExtractorAgent, IncomeExtractorAgent
+from llm import BatchingClient, make_openai_client
 # Carrega variáveis de ambiente
 load_dotenv()
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 BASE_URL = "https://api.deepseek.com/v1"
 
-class OpenAIClient:
-    """Cliente para comunicação com a API OpenAI."""
 
-    def __init__(self, api_key, base_url):
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+async def main():
+    llmClient = make_openai_client(
+        api_key=DEEPSEEK_API_KEY,
+        base_url=BASE_URL
+    )
+    if os.getenv("LLM_MAX_BATCH_SIZE"):
+        llmClient = BatchingClient(llmClient)
 
-    def send_messages(self, messages, tools):
-        """Envia uma mensagem ao modelo e captura a resposta."""
-        response = self.client.chat.completions.create(
-            model="deepseek-chat",
-            messages=messages,
-            tools=tools
-        )
-        return response.choices[0].message
+    coordinator = TaskCoordinatorAgent(llmClient, agents={
+        "ExpenseExtractorAgent": ExpenseExtractorAgent(llmClient),
+        "IncomeExtractorAgent": IncomeExtractorAgent(llmClient),
+    })
 
+    tasks = await coordinator.process("Recebi R$ 3.000 de salário ontem e gastei R$ 200 com supermercado hoje.")
+    results = await coordinator.delegate(tasks)
 
-if __name__ == "__main__":
+    for task, result in zip(tasks, results):
+        print(f"{task['agent']}: {result}")
 
-    llmClient = OpenAIClient(
-        api_key=DEEPSEEK_API_KEY,
-        base_url=BASE_URL
-    )
 
-    TaskCoordinatorAgent(llmClient).process("Recebi R$ 3.000 de salário ontem e gastei R$ 200 com supermercado hoje.")
\ No newline at end of file
+def configure_logging(level=logging.INFO):
+    """
+    Direciona os logs para uma fila consumida por uma thread em segundo plano,
+    para que a escrita no terminal não bloqueie o event loop.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
+if __name__ == "__main__":
+    listener = configure_logging()
+    try:
+        # Cria as tabelas e os índices declarados nos modelos, uma única vez
+        init_db()
+        asyncio.run(main())
+    finally:
+        listener.stop()
\ No newline at end of file
@@ -1 +1 @@
-from .db import get_db
\ No newline at end of file
+from .db import get_db, init_db
\ No newline at end of file
@@ -1,18 +1,33 @@
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 import os
 from contextlib import contextmanager
+from models import Base
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///financial_assistant.db")
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Enables WAL so each commit appends to the log instead of rewriting the database file."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+# Committed entities keep their loaded attributes, so repositories can return them
+# without a refresh and callers can still read them after the session is closed.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def init_db():
+    """Creates the tables and indexes declared in models, if they do not exist yet."""
+    Base.metadata.create_all(bind=engine)
 
-Base = declarative_base()
 
 @contextmanager
 def get_db():
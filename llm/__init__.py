@@ -0,0 +1,2 @@
+from .client import AsyncOpenAIClient, make_openai_client
+from .batching import BatchingClient
\ No newline at end of file
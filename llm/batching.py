@@ -0,0 +1,93 @@
+import asyncio
+import os
+from typing import Any, List, Set, Tuple
+
+
+class BatchingClient:
+    """
+    Agrupa requisições concorrentes ao modelo em lotes dinâmicos.
+
+    Um worker em segundo plano coleta até `max_batch_size` requisições, ou o
+    que chegar em `batch_timeout_ms`, e as envia em paralelo pelo cliente
+    subjacente, que compartilha o mesmo pool de conexões. Expõe a mesma
+    interface `send_messages` do cliente envolvido.
+
+    Configurável pelas variáveis de ambiente LLM_MAX_BATCH_SIZE e
+    LLM_BATCH_TIMEOUT_MS.
+    """
+
+    def __init__(self, client, max_batch_size: int = None, batch_timeout_ms: float = None):
+        """
+        Args:
+            client: Cliente assíncrono com o método `send_messages`.
+            max_batch_size: Número máximo de requisições por lote.
+            batch_timeout_ms: Tempo máximo de espera para completar um lote.
+        """
+        self.client = client
+        self.max_batch_size = max_batch_size or int(os.getenv("LLM_MAX_BATCH_SIZE", "8"))
+        self.batch_timeout = (batch_timeout_ms or float(os.getenv("LLM_BATCH_TIMEOUT_MS", "50"))) / 1000
+        self._queue: asyncio.Queue = None
+        self._worker: asyncio.Task = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    @property
+    def model(self):
+        return getattr(self.client, "model", None)
+
+    async def send_messages(self, messages, tools):
+        """Enfileira a requisição e aguarda o lote em que ela for enviada."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((messages, tools, future))
+        return await future
+
+    async def stream_messages(self, messages, tools):
+        """Respostas em streaming não são agrupadas: repassa direto ao cliente."""
+        async for delta in self.client.stream_messages(messages, tools):
+            yield delta
+
+    async def aclose(self) -> None:
+        """Encerra o worker e aguarda os lotes em andamento."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_timeout
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # O envio não bloqueia a coleta do próximo lote.
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, Any, asyncio.Future]]) -> None:
+        results = await asyncio.gather(
+            *(self.client.send_messages(messages, tools) for messages, tools, _ in batch),
+            return_exceptions=True
+        )
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,134 @@
+import logging
+import os
+import httpx
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    # O HTTP/2 do httpx depende do pacote opcional h2 (extra httpx[http2]).
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def make_http_client(max_connections: int = 100, max_keepalive_connections: int = 50) -> httpx.AsyncClient:
+    """
+    Cria o cliente HTTP com pool de conexões usado nas chamadas ao modelo.
+    Usa HTTP/2 quando o pacote h2 está instalado; caso contrário, HTTP/1.1
+    com os mesmos limites.
+    """
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+    )
+
+
+def make_openai_client(api_key, base_url, model: str = None, max_retries: int = None,
+                       timeout: float = None) -> "AsyncOpenAIClient":
+    """
+    Ponto único de construção do cliente do modelo.
+
+    A instância retornada deve ser compartilhada por todos os agentes, para que
+    as requisições concorrentes reutilizem o mesmo pool de conexões.
+    O modelo, o número de tentativas e o tempo limite podem ser definidos pelas
+    variáveis LLM_MODEL, LLM_MAX_RETRIES e LLM_TIMEOUT.
+    """
+    if model is None:
+        model = os.getenv("LLM_MODEL", "deepseek-chat")
+    if max_retries is None:
+        max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    if timeout is None:
+        timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+    return AsyncOpenAIClient(
+        api_key=api_key,
+        base_url=base_url,
+        model=model,
+        http_client=make_http_client(),
+        max_retries=max_retries,
+        timeout=timeout
+    )
+
+
+class AsyncOpenAIClient:
+    """Cliente assíncrono para comunicação com a API OpenAI."""
+
+    def __init__(self, api_key, base_url, model: str = "deepseek-chat", http_client: httpx.AsyncClient = None,
+                 max_retries: int = 3, temperature: float = 0.0, timeout: float = 60.0):
+        """
+        Args:
+            api_key: Chave da API.
+            base_url: URL base da API compatível com OpenAI.
+            model: Modelo usado nas requisições.
+            http_client: Cliente HTTP subjacente. Por padrão usa make_http_client(),
+                para que chamadas concorrentes compartilhem o pool de conexões.
+            max_retries: Tentativas extras, com espera exponencial, em erros de
+                conexão, limite de requisições (429) e erros 5xx.
+            temperature: Temperatura de amostragem. A extração é uma tarefa de saída
+                restrita, então o padrão 0 torna as respostas determinísticas.
+            timeout: Tempo limite de cada requisição, em segundos. Evita que uma
+                conexão travada segure a chamada pelo padrão de 10 minutos do SDK.
+        """
+        if http_client is None:
+            http_client = make_http_client()
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=http_client,
+            max_retries=max_retries,
+            timeout=timeout
+        )
+        self.model = model
+        self.temperature = temperature
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    async def send_messages(self, messages, tools):
+        """Envia uma mensagem ao modelo e aguarda a resposta sem bloquear o event loop."""
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=tools,
+            temperature=self.temperature
+        )
+        self._track_cache_usage(response.usage)
+        return response.choices[0].message
+
+    async def stream_messages(self, messages, tools):
+        """Envia uma mensagem ao modelo e devolve os deltas da resposta conforme são gerados."""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=tools,
+            temperature=self.temperature,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta
+
+    def _track_cache_usage(self, usage):
+        """
+        Acumula os tokens de prompt servidos pelo cache de prefixo do provedor.
+
+        O cache é automático para prefixos idênticos entre requisições, por isso o
+        prompt de sistema deve ser sempre a primeira mensagem e não variar.
+        O DeepSeek informa os acertos em `prompt_cache_hit_tokens`; a OpenAI em
+        `prompt_tokens_details.cached_tokens`.
+        """
+        if usage is None:
+            return
+
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+        if cached is None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached = getattr(details, "cached_tokens", None)
+
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.cached_prompt_tokens += cached or 0
+        logger.debug("Tokens de prompt: %s (em cache: %s)", usage.prompt_tokens, cached or 0)
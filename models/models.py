@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -16,6 +17,11 @@ class User(Base):
 
 class Expense(Base):
     __tablename__ = 'expense'
+    __table_args__ = (
+        # Inclui value para que o total por categoria seja lido só do índice.
+        Index('ix_expense_user_category_value', 'user_id', 'category', 'value'),
+        Index('ix_expense_user_created_at', 'user_id', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     description = Column(String(255), nullable=False)
@@ -26,8 +32,32 @@ class Expense(Base):
     user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
     user = relationship("User", back_populates="expenses")
 
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], user: User = None) -> List["Expense"]:
+        """
+        Constrói várias despesas a partir dos dicionários extraídos pelo agente.
+
+        O construtor do SQLAlchemy é mantido porque inicializa o estado ORM
+        da instância; o usuário, quando informado, é atribuído na mesma chamada.
+        """
+        expenses = []
+        append = expenses.append
+        if user is None:
+            for record in records:
+                append(cls(**record))
+        else:
+            for record in records:
+                append(cls(user=user, **record))
+        return expenses
+
 class Income(Base):
     __tablename__ = 'income'
+    __table_args__ = (
+        # Inclui value para que o total por fonte seja lido só do índice.
+        Index('ix_income_user_source_value', 'user_id', 'source', 'value'),
+        Index('ix_income_user_date', 'user_id', 'date'),
+        Index('ix_income_user_recurring', 'user_id', 'recurring'),
+    )
 
     id = Column(Integer, primary_key=True)
     description = Column(String(255), nullable=False)
@@ -1,6 +1,6 @@
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, extract
 from models import Expense
 from sqlalchemy.orm import Session
 from .repository import Repository
@@ -13,6 +13,12 @@ class ExpenseRepository(Repository[Expense]):
     def get_expenses_by_user(self, user_id: int) -> List[Expense]:
         return self.session.query(Expense).filter(Expense.user_id == user_id).all()
 
+    def iter_expenses_by_user(self, user_id: int, batch_size: int = 100) -> Iterator[Expense]:
+        """Percorre as despesas do usuário em lotes, sem carregar todas na memória."""
+        return self.session.query(Expense).filter(
+            Expense.user_id == user_id
+        ).order_by(Expense.id).yield_per(batch_size)
+
     def get_expenses_by_category(self, user_id: int, category: str) -> List[Expense]:
         return self.session.query(Expense).filter(
             Expense.user_id == user_id,
@@ -26,14 +32,114 @@ class ExpenseRepository(Repository[Expense]):
             Expense.created_at <= end_date
         ).all()
 
-    def get_total_by_category(self, user_id: int) -> List[dict]:
-        result = self.session.query(
+    def get_installment_expenses(self, user_id: int) -> List[Expense]:
+        return self.session.query(Expense).filter(
+            Expense.user_id == user_id,
+            Expense.installments > 1
+        ).all()
+
+    def get_expenses_above_category_average(self, user_id: int, start_date: datetime, end_date: datetime,
+                                            factor: float) -> List[Expense]:
+        period = (
+            Expense.user_id == user_id,
+            Expense.created_at >= start_date,
+            Expense.created_at <= end_date
+        )
+        averages = self.session.query(
+            Expense.category.label('category'),
+            func.avg(Expense.value).label('average')
+        ).filter(*period).group_by(Expense.category).subquery()
+
+        return self.session.query(Expense).join(
+            averages, Expense.category == averages.c.category
+        ).filter(
+            *period,
+            Expense.value > averages.c.average * factor
+        ).all()
+
+    def get_total_by_category(self, user_id: int) -> Dict[str, float]:
+        return dict(self.session.query(
             Expense.category,
             func.sum(Expense.value).label('total')
         ).filter(
             Expense.user_id == user_id
         ).group_by(
             Expense.category
+        ).all())
+
+    def sum_value(self, user_id: int, start_date: datetime, end_date: datetime) -> float:
+        result = self.session.query(func.sum(Expense.value)).filter(
+            Expense.user_id == user_id,
+            Expense.created_at >= start_date,
+            Expense.created_at <= end_date
+        ).scalar()
+
+        return result or 0.0
+
+    def sum_by_category(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict[str, float]:
+        return dict(self.session.query(
+            Expense.category,
+            func.sum(Expense.value)
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.created_at >= start_date,
+            Expense.created_at <= end_date
+        ).group_by(
+            Expense.category
+        ).all())
+
+    def sum_by_month(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict[int, float]:
+        month = extract('month', Expense.created_at)
+        result = self.session.query(
+            month,
+            func.sum(Expense.value)
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.created_at >= start_date,
+            Expense.created_at <= end_date
+        ).group_by(
+            month
         ).all()
 
-        return [{"category": r.category, "total": r.total} for r in result]
+        return {int(m): total for m, total in result}
+
+    def sum_by_year_month(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict[Tuple[int, int], float]:
+        year = extract('year', Expense.created_at)
+        month = extract('month', Expense.created_at)
+        result = self.session.query(
+            year,
+            month,
+            func.sum(Expense.value)
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.created_at >= start_date,
+            Expense.created_at <= end_date
+        ).group_by(
+            year,
+            month
+        ).all()
+
+        return {(int(y), int(m)): total for y, m, total in result}
+
+    def average_monthly_by_category(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict[str, float]:
+        year = extract('year', Expense.created_at)
+        month = extract('month', Expense.created_at)
+        monthly = self.session.query(
+            Expense.category.label('category'),
+            func.sum(Expense.value).label('total')
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.created_at >= start_date,
+            Expense.created_at <= end_date
+        ).group_by(
+            Expense.category,
+            year,
+            month
+        ).subquery()
+
+        return dict(self.session.query(
+            monthly.c.category,
+            func.avg(monthly.c.total)
+        ).group_by(
+            monthly.c.category
+        ).all())
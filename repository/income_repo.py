@@ -11,13 +11,29 @@ class IncomeRepository:
     def __init__(self, session: Session):
         self.session = session
 
-    def create(self, income: Income) -> Income:
-        """Cria um novo registro de rendimento no banco de dados."""
+    def create(self, income: Income, commit: bool = True) -> Income:
+        """
+        Cria um novo registro de rendimento no banco de dados.
+        Com commit=False apenas o adiciona à sessão, para que várias inserções
+        sejam confirmadas juntas por quem chamou.
+        """
         self.session.add(income)
-        self.session.commit()
-        self.session.refresh(income)
+        if commit:
+            self.session.commit()
         return income
 
+    def create_many(self, incomes: List[Income]) -> List[Income]:
+        """
+        Cria vários rendimentos em uma única transação, com um só commit.
+        Com a sessão de get_db (expire_on_commit=False) os rendimentos retornados
+        mantêm os ids gerados e podem ser lidos após o fechamento da sessão.
+        """
+        if not incomes:
+            return []
+        self.session.add_all(incomes)
+        self.session.commit()
+        return incomes
+
     def get_by_id(self, income_id: int) -> Optional[Income]:
         """Busca um rendimento pelo ID."""
         return self.session.query(Income).filter(Income.id == income_id).first()
@@ -41,6 +57,24 @@ class IncomeRepository:
             Income.date <= end_date
         ).all()
 
+    def get_rows_by_date_range(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Any]:
+        """
+        Busca apenas as colunas usadas nas análises, em um intervalo de datas.
+        Retorna linhas leves (Row) em vez de objetos Income: sem estado no mapa
+        de identidade da sessão e sem carregar o usuário. Os campos continuam
+        acessíveis como atributos (row.value, row.source, row.date, row.recurring).
+        """
+        return self.session.query(
+            Income.value,
+            Income.source,
+            Income.date,
+            Income.recurring
+        ).filter(
+            Income.user_id == user_id,
+            Income.date >= start_date,
+            Income.date <= end_date
+        ).all()
+
     def get_recurring_incomes(self, user_id: int) -> List[Income]:
         """Busca rendimentos recorrentes de um usuário."""
         return self.session.query(Income).filter(
@@ -83,10 +117,20 @@ class IncomeRepository:
         return result
 
     def update(self, income: Income) -> Income:
-        """Atualiza um rendimento existente."""
+        """
+        Atualiza um rendimento já associado à sessão e o retorna.
+        Com a sessão de get_db (expire_on_commit=False) o rendimento continua
+        legível após o fechamento da sessão. Para rendimentos desanexados use upsert.
+        """
         self.session.commit()
         return income
 
+    def upsert(self, income: Income) -> Income:
+        """Mescla um rendimento desanexado na sessão e confirma; retorna a instância associada."""
+        merged = self.session.merge(income)
+        self.session.commit()
+        return merged
+
     def delete(self, income_id: int) -> bool:
         """Remove um rendimento pelo ID."""
         income = self.get_by_id(income_id)
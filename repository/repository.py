@@ -20,18 +20,43 @@ class Repository(Generic[T], ABC):
     def get_all(self) -> List[T]:
         return self.session.query(self.model_class).all()
 
-    def create(self, entity: T) -> T:
+    def create(self, entity: T, commit: bool = True) -> T:
+        """
+        Insere a entidade. Com commit=False apenas a adiciona à sessão, para
+        que várias inserções sejam confirmadas juntas por quem chamou.
+        """
         self.session.add(entity)
-        self.session.commit()
-        self.session.refresh(entity)
+        if commit:
+            self.session.commit()
         return entity
 
+    def create_many(self, entities: List[T]) -> List[T]:
+        """
+        Insere várias entidades em uma única transação, com um só commit.
+        Com a sessão de get_db (expire_on_commit=False) as entidades retornadas
+        mantêm os ids gerados e podem ser lidas após o fechamento da sessão.
+        """
+        if not entities:
+            return []
+        self.session.add_all(entities)
+        self.session.commit()
+        return entities
+
     def update(self, entity: T) -> T:
-        self.session.merge(entity)
+        """
+        Confirma as alterações de uma entidade já associada à sessão e a retorna.
+        Com a sessão de get_db (expire_on_commit=False) a entidade continua
+        legível após o fechamento da sessão. Para entidades desanexadas use upsert.
+        """
         self.session.commit()
-        self.session.refresh(entity)
         return entity
 
+    def upsert(self, entity: T) -> T:
+        """Mescla uma entidade desanexada na sessão e confirma; retorna a instância associada."""
+        merged = self.session.merge(entity)
+        self.session.commit()
+        return merged
+
     def delete(self, id: int) -> bool:
         entity = self.get_by_id(id)
         if entity:
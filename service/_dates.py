@@ -0,0 +1,11 @@
+import calendar
+from datetime import datetime
+
+# Nomes dos meses resolvidos uma única vez (índice 0 vazio, como em calendar.month_name).
+MONTH_NAMES = tuple(calendar.month_name)
+
+
+def month_start(year: int, month: int, offset: int = 0) -> datetime:
+    """Retorna o primeiro dia do mês deslocado em `offset` meses, tratando a virada de ano."""
+    year, month_index = divmod(year * 12 + month - 1 + offset, 12)
+    return datetime(year, month_index + 1, 1)
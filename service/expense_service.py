@@ -4,7 +4,9 @@ from repository import ExpenseRepository
 from agents.expense_agents import ExpenseExtractorAgent
 from typing import Optional, List, Dict, Tuple, Any
 import calendar
-from collections import defaultdict
+from heapq import nlargest
+from operator import itemgetter
+from ._dates import MONTH_NAMES, month_start
 
 
 class ExpenseService:
@@ -40,36 +42,30 @@ class ExpenseService:
         return self.expense_repository.get_expenses_by_category(user_id, category)
 
     def get_monthly_expenses(self, user_id: int, year: int, month: int) -> List[Expense]:
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+        start_date = month_start(year, month)
+        end_date = month_start(year, month, 1) - timedelta(microseconds=1)
 
         return self.expense_repository.get_expenses_by_date_range(user_id, start_date, end_date)
 
+    def get_monthly_total(self, user_id: int, year: int, month: int) -> float:
+        start_date = month_start(year, month)
+        end_date = month_start(year, month, 1) - timedelta(microseconds=1)
+
+        return self.expense_repository.sum_value(user_id, start_date, end_date)
+
     def get_installment_expenses(self, user_id: int) -> List[Expense]:
         return self.expense_repository.get_installment_expenses(user_id)
 
-    def process_expense_message(self, user_id: int, message: str) -> List[Expense]:
+    async def process_expense_message(self, user_id: int, message: str) -> List[Expense]:
         if self.expense_extractor is None:
             raise ValueError("Expense extractor agent is not configured")
 
-        extracted_expenses = self.expense_extractor.process(message)
+        extracted_expenses = await self.expense_extractor.process(message)
 
-        saved_expenses = []
-        for expense_data in extracted_expenses:
-            expense = Expense(
-                description=expense_data.description,
-                value=expense_data.value,
-                category=expense_data.category,
-                user_id=user_id,
-                installments=getattr(expense_data, 'installments', None)
-            )
-            saved_expense = self.expense_repository.create(expense)
-            saved_expenses.append(saved_expense)
+        for expense in extracted_expenses:
+            expense.user_id = user_id
 
-        return saved_expenses
+        return self.expense_repository.create_many(extracted_expenses)
 
     # --- NOVAS FUNCIONALIDADES DE ANÁLISE DE DADOS ---
 
@@ -86,13 +82,7 @@ class ExpenseService:
         Returns:
             Dicionário com categorias como chaves e valores totais como valores
         """
-        expenses = self.expense_repository.get_expenses_by_date_range(user_id, start_date, end_date)
-
-        totals_by_category = defaultdict(float)
-        for expense in expenses:
-            totals_by_category[expense.category] += expense.value
-
-        return dict(totals_by_category)
+        return self.expense_repository.sum_by_category(user_id, start_date, end_date)
 
     def get_category_ranking(self, user_id: int, start_date: datetime,
                              end_date: datetime) -> List[Tuple[str, float]]:
@@ -108,7 +98,7 @@ class ExpenseService:
             Lista de tuplas (categoria, valor_total) ordenada por valor decrescente
         """
         category_totals = self.get_expenses_by_category_period(user_id, start_date, end_date)
-        return sorted(category_totals.items(), key=lambda x: x[1], reverse=True)
+        return sorted(category_totals.items(), key=itemgetter(1), reverse=True)
 
     def get_monthly_average(self, user_id: int,
                             months_back: int = 6) -> Dict[str, float]:
@@ -123,30 +113,11 @@ class ExpenseService:
             Dicionário com categorias como chaves e médias mensais como valores
         """
         today = datetime.now()
-        start_date = datetime(today.year, today.month, 1) - timedelta(days=1)
-
-        # Retrocede o número de meses especificado
-        for _ in range(months_back):
-            if start_date.month == 1:
-                start_date = datetime(start_date.year - 1, 12, 1)
-            else:
-                start_date = datetime(start_date.year, start_date.month - 1, 1)
-
-        expenses = self.expense_repository.get_expenses_by_date_range(
-            user_id, start_date, datetime.now())
-
-        # Agrupa por categoria e mês
-        expenses_by_category_month = defaultdict(lambda: defaultdict(float))
-        for expense in expenses:
-            month_key = f"{expense.date.year}-{expense.date.month}"
-            expenses_by_category_month[expense.category][month_key] += expense.value
-
-        # Calcula a média para cada categoria
-        category_averages = {}
-        for category, monthly_values in expenses_by_category_month.items():
-            category_averages[category] = sum(monthly_values.values()) / len(monthly_values)
+        # Início do mês `months_back` meses antes do mês anterior
+        start_date = month_start(today.year, today.month, -(months_back + 1))
 
-        return category_averages
+        # Soma por categoria e mês, e a média dos meses, calculadas pelo banco
+        return self.expense_repository.average_monthly_by_category(user_id, start_date, datetime.now())
 
     def detect_expense_anomalies(self, user_id: int, threshold_percent: float = 50.0) -> List[Expense]:
         """
@@ -161,38 +132,11 @@ class ExpenseService:
         """
         # Obtém os últimos 3 meses de despesas
         today = datetime.now()
-        start_date = datetime(today.year, today.month, 1) - timedelta(days=1)
-        if start_date.month < 3:
-            # Ajusta para ano anterior se necessário
-            if start_date.month == 2:
-                start_date = datetime(start_date.year - 1, 12, 1)
-            elif start_date.month == 1:
-                start_date = datetime(start_date.year - 1, 11, 1)
-        else:
-            start_date = datetime(start_date.year, start_date.month - 2, 1)
-
-        expenses = self.expense_repository.get_expenses_by_date_range(
-            user_id, start_date, datetime.now())
-
-        # Calcula média por categoria
-        category_values = defaultdict(list)
-        for expense in expenses:
-            category_values[expense.category].append(expense.value)
-
-        category_averages = {
-            cat: sum(values) / len(values)
-            for cat, values in category_values.items()
-        }
-
-        # Identifica anomalias
-        anomalies = []
-        for expense in expenses:
-            if expense.category in category_averages:
-                avg = category_averages[expense.category]
-                if expense.value > avg * (1 + threshold_percent / 100):
-                    anomalies.append(expense)
+        start_date = month_start(today.year, today.month, -3)
 
-        return anomalies
+        # Médias por categoria e comparação calculadas pelo banco em uma única consulta
+        return self.expense_repository.get_expenses_above_category_average(
+            user_id, start_date, datetime.now(), 1 + threshold_percent / 100)
 
     def get_monthly_trend(self, user_id: int, months: int = 6) -> List[Dict[str, Any]]:
         """
@@ -208,18 +152,16 @@ class ExpenseService:
         today = datetime.now()
         results = []
 
+        # Uma única consulta agrupada por (ano, mês) cobre toda a janela
+        start_date = month_start(today.year, today.month, -(months - 1))
+        totals = self.expense_repository.sum_by_year_month(user_id, start_date, today)
+
         for i in range(months - 1, -1, -1):
             # Calcula o mês atual no loop
-            if today.month - i <= 0:
-                year = today.year - 1
-                month = 12 + (today.month - i)
-            else:
-                year = today.year
-                month = today.month - i
+            current = month_start(today.year, today.month, -i)
+            year, month = current.year, current.month
 
-            # Obtém despesas do mês
-            expenses = self.get_monthly_expenses(user_id, year, month)
-            total = sum(expense.value for expense in expenses)
+            total = totals.get((year, month), 0.0)
 
             # Calcula variação percentual (exceto para o primeiro mês)
             percent_change = None
@@ -229,7 +171,7 @@ class ExpenseService:
             results.append({
                 'year': year,
                 'month': month,
-                'month_name': calendar.month_name[month],
+                'month_name': MONTH_NAMES[month],
                 'total': total,
                 'percent_change': percent_change
             })
@@ -249,27 +191,21 @@ class ExpenseService:
         today = datetime.now()
         start_date = datetime(today.year, 1, 1)
 
-        expenses = self.expense_repository.get_expenses_by_date_range(
-            user_id, start_date, today)
+        # Agregações feitas pelo banco: totais por mês e por categoria
+        totals_by_month = self.expense_repository.sum_by_month(user_id, start_date, today)
+        category_totals = self.expense_repository.sum_by_category(user_id, start_date, today)
 
         # Total gasto no ano
-        total_spent = sum(expense.value for expense in expenses)
+        total_spent = sum(totals_by_month.values())
 
         # Gastos por mês
-        monthly_totals = defaultdict(float)
-        for expense in expenses:
-            month_key = calendar.month_name[expense.date.month]
-            monthly_totals[month_key] += expense.value
+        monthly_totals = {MONTH_NAMES[month]: total for month, total in sorted(totals_by_month.items())}
 
         # Mês com maior gasto
-        max_spending_month = max(monthly_totals.items(), key=lambda x: x[1]) if monthly_totals else None
+        max_spending_month = max(monthly_totals.items(), key=itemgetter(1)) if monthly_totals else None
 
         # Top 3 categorias
-        category_totals = defaultdict(float)
-        for expense in expenses:
-            category_totals[expense.category] += expense.value
-
-        top_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:3]
+        top_categories = nlargest(3, category_totals.items(), key=itemgetter(1))
 
         # Media mensal
         months_passed = today.month
@@ -279,34 +215,36 @@ class ExpenseService:
             'year': today.year,
             'total_spent': total_spent,
             'monthly_average': monthly_average,
-            'monthly_totals': dict(monthly_totals),
+            'monthly_totals': monthly_totals,
             'max_spending_month': max_spending_month,
             'top_categories': top_categories
         }
 
-    def predict_monthly_expenses(self, user_id: int, months_ahead: int = 3) -> List[Dict[str, Any]]:
+    def predict_monthly_expenses(self, user_id: int, months_ahead: int = 3,
+                                 monthly_trend: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Prevê gastos para os próximos meses com base nos padrões históricos.
 
         Args:
             user_id: ID do usuário
             months_ahead: Número de meses para prever
+            monthly_trend: Tendência dos últimos meses já calculada, para evitar
+                consultá-la novamente
 
         Returns:
             Lista de dicionários com previsões mensais
         """
         # Obtém dados dos últimos 6 meses para análise
-        monthly_trend = self.get_monthly_trend(user_id, months=6)
+        if monthly_trend is None:
+            monthly_trend = self.get_monthly_trend(user_id, months=6)
 
         if not monthly_trend:
             return []
 
         # Calcula a taxa média de crescimento mensal
-        growth_rates = []
-        for i in range(1, len(monthly_trend)):
-            if monthly_trend[i - 1]['total'] > 0:
-                rate = (monthly_trend[i]['total'] - monthly_trend[i - 1]['total']) / monthly_trend[i - 1]['total']
-                growth_rates.append(rate)
+        totals = [month['total'] for month in monthly_trend]
+        growth_rates = [(current - previous) / previous
+                        for previous, current in zip(totals, totals[1:]) if previous > 0]
 
         # Se não houver taxas de crescimento calculáveis, usa o último mês como base
         avg_growth_rate = sum(growth_rates) / len(growth_rates) if growth_rates else 0
@@ -314,18 +252,13 @@ class ExpenseService:
         # Mês e ano base (último mês nos dados)
         base_month = monthly_trend[-1]['month']
         base_year = monthly_trend[-1]['year']
-        base_amount = monthly_trend[-1]['total']
+        base_amount = totals[-1]
 
         predictions = []
         for i in range(1, months_ahead + 1):
             # Calcula o próximo mês
-            next_month = base_month + i
-            next_year = base_year
-
-            # Ajusta para virada de ano
-            if next_month > 12:
-                next_month = next_month - 12
-                next_year += 1
+            next_date = month_start(base_year, base_month, i)
+            next_year, next_month = next_date.year, next_date.month
 
             # Prevê o valor com crescimento composto
             predicted_amount = base_amount * ((1 + avg_growth_rate) ** i)
@@ -333,7 +266,7 @@ class ExpenseService:
             predictions.append({
                 'year': next_year,
                 'month': next_month,
-                'month_name': calendar.month_name[next_month],
+                'month_name': MONTH_NAMES[next_month],
                 'predicted_amount': predicted_amount,
                 'growth_rate_applied': avg_growth_rate
             })
@@ -352,12 +285,12 @@ class ExpenseService:
         """
         today = datetime.now()
         start_of_month = datetime(today.year, today.month, 1)
+        days_in_month = calendar.monthrange(today.year, today.month)[1]
         start_of_year = datetime(today.year, 1, 1)
 
-        # Despesas do mês atual
-        current_month_expenses = self.expense_repository.get_expenses_by_date_range(
-            user_id, start_of_month, today)
-        current_month_total = sum(expense.value for expense in current_month_expenses)
+        # Despesas por categoria no mês atual, agregadas pelo banco
+        category_totals = self.expense_repository.sum_by_category(user_id, start_of_month, today)
+        current_month_total = sum(category_totals.values())
 
         # Resumo do ano
         ytd_summary = self.get_year_to_date_summary(user_id)
@@ -365,13 +298,8 @@ class ExpenseService:
         # Tendência dos últimos meses
         monthly_trend = self.get_monthly_trend(user_id, months=6)
 
-        # Despesas por categoria no mês atual
-        category_totals = defaultdict(float)
-        for expense in current_month_expenses:
-            category_totals[expense.category] += expense.value
-
-        # Previsão para os próximos meses
-        predictions = self.predict_monthly_expenses(user_id, months_ahead=3)
+        # Previsão para os próximos meses, reaproveitando a tendência já calculada
+        predictions = self.predict_monthly_expenses(user_id, months_ahead=3, monthly_trend=monthly_trend)
 
         # Anomalias detectadas
         anomalies = self.detect_expense_anomalies(user_id)
@@ -383,12 +311,12 @@ class ExpenseService:
         return {
             'current_date': today.strftime('%Y-%m-%d'),
             'current_month': {
-                'name': calendar.month_name[today.month],
+                'name': MONTH_NAMES[today.month],
                 'total_spent': current_month_total,
-                'categories': dict(category_totals),
+                'categories': category_totals,
                 'day_of_month': today.day,
-                'days_in_month': calendar.monthrange(today.year, today.month)[1],
-                'percentage_of_month_elapsed': (today.day / calendar.monthrange(today.year, today.month)[1]) * 100
+                'days_in_month': days_in_month,
+                'percentage_of_month_elapsed': (today.day / days_in_month) * 100
             },
             'year_summary': ytd_summary,
             'monthly_trend': monthly_trend,
@@ -4,6 +4,9 @@ from typing import Optional, List, Dict, Tuple, Any
 from repository import IncomeRepository
 import calendar
 from collections import defaultdict
+from heapq import nlargest
+from operator import itemgetter
+from ._dates import MONTH_NAMES, month_start
 
 class IncomeService:
     """Serviço para operações relacionadas a rendimentos com análises estatísticas."""
@@ -70,11 +73,8 @@ class IncomeService:
         Returns:
             Lista de rendimentos do mês
         """
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+        start_date = month_start(year, month)
+        end_date = month_start(year, month, 1) - timedelta(microseconds=1)
 
         return self.income_repository.get_incomes_by_date_range(user_id, start_date, end_date)
 
@@ -82,7 +82,7 @@ class IncomeService:
         """Busca rendimentos recorrentes de um usuário."""
         return self.income_repository.get_recurring_incomes(user_id)
 
-    def process_income_message(self, user_id: int, message: str) -> List[Income]:
+    async def process_income_message(self, user_id: int, message: str) -> List[Income]:
         """
         Processa uma mensagem para extrair informações de rendimentos.
 
@@ -96,15 +96,12 @@ class IncomeService:
         if self.income_extractor is None:
             raise ValueError("Income extractor agent is not configured")
 
-        extracted_incomes = self.income_extractor.process(message)
+        extracted_incomes = await self.income_extractor.process(message)
 
-        saved_incomes = []
         for income in extracted_incomes:
             income.user_id = user_id
-            saved_income = self.income_repository.create(income)
-            saved_incomes.append(saved_income)
 
-        return saved_incomes
+        return self.income_repository.create_many(extracted_incomes)
 
     # --- FUNCIONALIDADES DE ANÁLISE DE DADOS ---
 
@@ -121,7 +118,7 @@ class IncomeService:
         Returns:
             Dicionário com fontes como chaves e valores totais como valores
         """
-        incomes = self.income_repository.get_incomes_by_date_range(user_id, start_date, end_date)
+        incomes = self.income_repository.get_rows_by_date_range(user_id, start_date, end_date)
 
         totals_by_source = defaultdict(float)
         for income in incomes:
@@ -143,7 +140,7 @@ class IncomeService:
             Lista de tuplas (fonte, valor_total) ordenada por valor decrescente
         """
         source_totals = self.get_income_by_source_period(user_id, start_date, end_date)
-        return sorted(source_totals.items(), key=lambda x: x[1], reverse=True)
+        return sorted(source_totals.items(), key=itemgetter(1), reverse=True)
 
     def get_monthly_average(self, user_id: int, months_back: int = 6) -> Dict[str, float]:
         """
@@ -157,16 +154,10 @@ class IncomeService:
             Dicionário com fontes como chaves e médias mensais como valores
         """
         today = datetime.now()
-        start_date = datetime(today.year, today.month, 1) - timedelta(days=1)
+        # Início do mês `months_back` meses antes do mês anterior
+        start_date = month_start(today.year, today.month, -(months_back + 1))
 
-        # Retrocede o número de meses especificado
-        for _ in range(months_back):
-            if start_date.month == 1:
-                start_date = datetime(start_date.year - 1, 12, 1)
-            else:
-                start_date = datetime(start_date.year, start_date.month - 1, 1)
-
-        incomes = self.income_repository.get_incomes_by_date_range(
+        incomes = self.income_repository.get_rows_by_date_range(
             user_id, start_date, datetime.now())
 
         # Agrupa por fonte e mês
@@ -198,16 +189,11 @@ class IncomeService:
 
         for i in range(months - 1, -1, -1):
             # Calcula o mês atual no loop
-            if today.month - i <= 0:
-                year = today.year - 1
-                month = 12 + (today.month - i)
-            else:
-                year = today.year
-                month = today.month - i
+            current = month_start(today.year, today.month, -i)
+            year, month = current.year, current.month
 
-            # Obtém rendimentos do mês
-            incomes = self.get_monthly_incomes(user_id, year, month)
-            total = sum(income.value for income in incomes)
+            # Total do mês somado pelo banco
+            total = self.income_repository.get_monthly_total(user_id, year, month)
 
             # Calcula variação percentual (exceto para o primeiro mês)
             percent_change = None
@@ -217,7 +203,7 @@ class IncomeService:
             results.append({
                 'year': year,
                 'month': month,
-                'month_name': calendar.month_name[month],
+                'month_name': MONTH_NAMES[month],
                 'total': total,
                 'percent_change': percent_change
             })
@@ -237,7 +223,7 @@ class IncomeService:
         today = datetime.now()
         start_date = datetime(today.year, 1, 1)
 
-        incomes = self.income_repository.get_incomes_by_date_range(
+        incomes = self.income_repository.get_rows_by_date_range(
             user_id, start_date, today)
 
         # Total recebido no ano
@@ -246,18 +232,18 @@ class IncomeService:
         # Rendimentos por mês
         monthly_totals = defaultdict(float)
         for income in incomes:
-            month_key = calendar.month_name[income.date.month]
+            month_key = MONTH_NAMES[income.date.month]
             monthly_totals[month_key] += income.value
 
         # Mês com maior rendimento
-        max_income_month = max(monthly_totals.items(), key=lambda x: x[1]) if monthly_totals else None
+        max_income_month = max(monthly_totals.items(), key=itemgetter(1)) if monthly_totals else None
 
         # Top 3 fontes
         source_totals = defaultdict(float)
         for income in incomes:
             source_totals[income.source] += income.value
 
-        top_sources = sorted(source_totals.items(), key=lambda x: x[1], reverse=True)[:3]
+        top_sources = nlargest(3, source_totals.items(), key=itemgetter(1))
 
         # Media mensal
         months_passed = today.month
@@ -307,13 +293,8 @@ class IncomeService:
         predictions = []
         for i in range(1, months_ahead + 1):
             # Calcula o próximo mês
-            next_month = base_month + i
-            next_year = base_year
-
-            # Ajusta para virada de ano
-            if next_month > 12:
-                next_month = next_month - 12
-                next_year += 1
+            next_date = month_start(base_year, base_month, i)
+            next_year, next_month = next_date.year, next_date.month
 
             # Prevê o valor com crescimento composto
             predicted_amount = base_amount * ((1 + avg_growth_rate) ** i)
@@ -321,7 +302,7 @@ class IncomeService:
             predictions.append({
                 'year': next_year,
                 'month': next_month,
-                'month_name': calendar.month_name[next_month],
+                'month_name': MONTH_NAMES[next_month],
                 'predicted_amount': predicted_amount,
                 'growth_rate_applied': avg_growth_rate
             })
@@ -340,16 +321,10 @@ class IncomeService:
             Dicionário com métricas de diversidade
         """
         today = datetime.now()
-        start_date = datetime(today.year, today.month, 1) - timedelta(days=1)
+        # Início do mês `period_months` meses antes do atual
+        start_date = month_start(today.year, today.month, -period_months)
 
-        # Retrocede o número de meses especificado
-        for _ in range(period_months - 1):
-            if start_date.month == 1:
-                start_date = datetime(start_date.year - 1, 12, 1)
-            else:
-                start_date = datetime(start_date.year, start_date.month - 1, 1)
-
-        incomes = self.income_repository.get_incomes_by_date_range(
+        incomes = self.income_repository.get_rows_by_date_range(
             user_id, start_date, datetime.now())
 
         if not incomes:
@@ -384,7 +359,7 @@ class IncomeService:
         diversity_index = min(100, diversity_index * 100)
 
         # Dependência da principal fonte
-        main_source = max(source_totals.items(), key=lambda x: x[1]) if source_totals else ("Nenhuma", 0)
+        main_source = max(source_totals.items(), key=itemgetter(1)) if source_totals else ("Nenhuma", 0)
         main_source_dependency = (main_source[1] / total_income * 100) if total_income > 0 else 0
 
         # Percentual de rendimentos recorrentes
@@ -418,20 +393,14 @@ class IncomeService:
         # Analisa cada mês no período
         for i in range(period_months - 1, -1, -1):
             # Calcula o mês atual no loop
-            if today.month - i <= 0:
-                year = today.year - 1
-                month = 12 + (today.month - i)
-            else:
-                year = today.year
-                month = today.month - i
-
-            # Obtém rendimentos e despesas do mês
-            month_incomes = self.get_monthly_incomes(user_id, year, month)
-            income_total = sum(income.value for income in month_incomes)
+            current = month_start(today.year, today.month, -i)
+            year, month = current.year, current.month
+
+            # Totais de rendimentos e despesas do mês somados pelo banco
+            income_total = self.income_repository.get_monthly_total(user_id, year, month)
             total_income += income_total
 
-            month_expenses = expense_service.get_monthly_expenses(user_id, year, month)
-            expense_total = sum(expense.value for expense in month_expenses)
+            expense_total = expense_service.get_monthly_total(user_id, year, month)
             total_expense += expense_total
 
             # Calcula saldo e taxa de economia
@@ -441,7 +410,7 @@ class IncomeService:
             monthly_balance.append({
                 'year': year,
                 'month': month,
-                'month_name': calendar.month_name[month],
+                'month_name': MONTH_NAMES[month],
                 'income': income_total,
                 'expense': expense_total,
                 'balance': balance,
@@ -486,7 +455,7 @@ class IncomeService:
         start_of_month = datetime(today.year, today.month, 1)
 
         # Rendimentos do mês atual
-        current_month_incomes = self.income_repository.get_incomes_by_date_range(
+        current_month_incomes = self.income_repository.get_rows_by_date_range(
             user_id, start_of_month, today)
         current_month_total = sum(income.value for income in current_month_incomes)
 
@@ -515,7 +484,7 @@ class IncomeService:
         return {
             'current_date': today.strftime('%Y-%m-%d'),
             'current_month': {
-                'name': calendar.month_name[today.month],
+                'name': MONTH_NAMES[today.month],
                 'total_received': current_month_total,
                 'sources': dict(source_totals),
                 'day_of_month': today.day,
@@ -1,3 +1,4 @@
+import logging
 import uuid
 from typing import Dict, List, Optional, Any
 from squadai.agents import BaseAgent
@@ -7,6 +8,8 @@ from squadai.tools import BaseTool, ToolCall, ToolUsage
 from squadai.utils.agents_utils import format_message_for_llm
 from squadai.utils.agents_utils import parse_tools
 
+logger = logging.getLogger(__name__)
+
 class AgentExecutor:
     def __init__(
             self,
@@ -130,7 +133,7 @@ class AgentExecutor:
                     self._append_message(result_str, role="tool", tool_call_id=call.id)
 
             except Exception as e:
-                print(f"Erro {e}")
+                logger.exception("Erro ao executar a ferramenta %s: %s", call.function.name, e)
 
     def _format_prompt(self, prompt: str, inputs: Dict[str, str]) -> str:
         prompt = prompt.replace("{input}", inputs["input"])
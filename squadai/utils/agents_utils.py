@@ -1,7 +1,10 @@
+import logging
 from typing import List, Any, Optional, Dict
 
 from squadai.tools import BaseTool
 
+logger = logging.getLogger(__name__)
+
 
 def parse_tools(tools: List[BaseTool]) -> List[Dict[str,Any]]:
     """
@@ -25,7 +28,7 @@ def parse_tools(tools: List[BaseTool]) -> List[Dict[str,Any]]:
             parsed_tool: Dict[str,Any] = tool.to_openai_function()
             parsed_tools.append(parsed_tool)
         except Exception as e:
-            print(f"Erro ao formatar ferramenta {tool.name}: {e}")
+            logger.warning("Erro ao formatar ferramenta %s: %s", tool.name, e)
 
     return parsed_tools
 
@@ -366,7 +366,7 @@ class PydanticParserTool(BaseTool):
         Executa o parsing dos dados recebidos.
         """
         try:
-            logger.info(f"Iniciando parsing com dados: {kwargs}")
+            logger.info("Iniciando parsing com dados: %s", kwargs)
 
             if not kwargs:
                 raise PydanticParsingError("Nenhum dado recebido para parsing")
@@ -437,7 +437,7 @@ class PydanticParserTool(BaseTool):
 
     def _parse_with_recovery(self, data: Dict[str, Any], original_error: ValidationError) -> BaseModel:
         """Tenta parsing com estratégia de recuperação defensiva."""
-        logger.info(f"Iniciando recuperação para erros: {len(original_error.errors())} encontrados")
+        logger.info("Iniciando recuperação para erros: %s encontrados", len(original_error.errors()))
 
         # Estratégia 1: Limpar dados baseado nos erros específicos
         try:
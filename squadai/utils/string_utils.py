@@ -1,6 +1,10 @@
 import re
 from typing import Any, Dict, List, Optional, Union
 
+# Matches {variable_name} where variable_name starts with a letter/underscore
+# and contains only letters, numbers, and underscores
+_PLACEHOLDER_PATTERN = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
 
 def interpolate_only(
     input_string: Optional[str],
@@ -56,13 +60,8 @@ def interpolate_only(
             "Inputs dictionary cannot be empty when interpolating variables"
         )
 
-    # The regex pattern to find valid variable placeholders
-    # Matches {variable_name} where variable_name starts with a letter/underscore
-    # and contains only letters, numbers, and underscores
-    pattern = r"\{([A-Za-z_][A-Za-z0-9_]*)\}"
-
     # Find all matching variables in the input string
-    variables = re.findall(pattern, input_string)
+    variables = _PLACEHOLDER_PATTERN.findall(input_string)
     result = input_string
 
     # Check if all variables exist in inputs